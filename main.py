@@ -1,6 +1,9 @@
-import os, json, requests
+import io, os, time, random, asyncio, sqlite3
+import ijson
+import orjson
+import aiohttp
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 # -------------------- CONFIG BÁSICA --------------------
@@ -41,7 +44,7 @@ SPORT_KEYS = [
 REGIONS = ["eu", "uk", "us"]  # regiões de books na The Odds API
 MARKETS = ["h2h"]  # mercado head‑to‑head
 SHARP_BOOKS = ["pinnacle", "betfair_exchange"]  # base para prob. justa
-TARGET_BOOKS = {
+TARGET_BOOKS = frozenset({
     "bet365",
     "williamhill",
     "unibet",
@@ -49,14 +52,25 @@ TARGET_BOOKS = {
     "bwin",
     "888sport",
     "betfair",
-}  # onde buscamos valor
+})  # onde buscamos valor
 
 MIN_EDGE_PCT = 3.0  # edge mínima para alertar
+MIN_EDGE = MIN_EDGE_PCT / 100.0
 MIN_DECIMAL_ODDS = 1.50  # odds mínimas
 MAX_START_TIME_HOURS = 48  # só jogos até 48h à frente
 COOLDOWN_MINUTES = 90  # evita alerta duplicado
+SENT_CACHE_DB = "sent_cache.db"  # chaves já alertadas -> timestamp do envio
+POLL_MIN_SECONDS = 5  # intervalo entre scans: perto do jogo...
+POLL_MAX_SECONDS = 600  # ...e sem jogos próximos
 
 ODDS_API_BASE = "https://api.the-odds-api.com/v4"
+MAX_CONCURRENT_REQUESTS = 8  # downloads simultâneos na The Odds API (rate limit)
+ISO_UTC_FORMAT = "%Y-%m-%dT%H:%M:%SZ"  # formato de commence_time na The Odds API
+ODDS_CACHE_DIR = "odds_cache"  # respostas cruas por (sport_key, regions, markets)
+ODDS_CACHE_TTL_SECONDS = 45  # scans dentro da janela não chamam a API
+
+TELEGRAM_MAX_CHARS = 4000  # limite da API é 4096 por mensagem
+ALERT_SEPARATOR = "\n\n\\-\\-\\-\n\n"  # "---" já escapado para MarkdownV2
 
 # -------------------- ENV REQUERIDOS --------------------
 ODDS_API_KEY = os.getenv("ODDS_API_KEY", "").strip()
@@ -83,47 +97,99 @@ def kelly_fraction(decimal_odds: float, fair_prob: float) -> float:
     return max(0.0, f)
 
 
+_MD_ESCAPE = str.maketrans({ch: "\\" + ch for ch in "_[]()~`>#+-=|{}.!"})
+
+
 def sanitize_md(text: str) -> str:
-    specials = "_[]()~`>#+-=|{}.!"
-    for ch in specials:
-        text = text.replace(ch, f"\\{ch}")
-    return text
+    return text.translate(_MD_ESCAPE)
+
+
+_ALERT_TITLE = sanitize_md("🎾 Alerta de valor em tênis")  # parte fixa, escapada uma vez
 
 
 def format_alert(payload: Dict[str, Any]) -> str:
-    title = "🎾 Alerta de valor em tênis"
     matchup = f"{payload['away']} vs {payload['home']}"
     when = payload["start_time_local"]
     line = f"Mercado h2h - {payload['pick_name']}"
     price = f"{payload['book']} {payload['price']:.2f} - edge {payload['edge_pct']:.1f}%"
     fair = f"Prob justa {payload['fair_prob']*100:.1f}% - Kelly {payload['kelly']*100:.1f}%"
     comp = f"Base justa: {payload['basis']}"
-    msg = "\n".join(
-        sanitize_md(s) for s in [title, matchup, when, line, price, fair, comp] if s
-    )
-    return msg
+    body = "\n".join(s for s in [matchup, when, line, price, fair, comp] if s)
+    return _ALERT_TITLE + "\n" + sanitize_md(body)
 
 
 def event_key(
     ev_id: str, book: str, pick_name: str, price: float, fair_prob: float, basis: str
 ) -> str:
-    return f"{ev_id}|{book}|{pick_name}|{price:.3f}|{fair_prob:.5f}|{basis}"
+    # Preço e prob. quantizados em inteiros (milésimos / 1e-5): formatar int é
+    # mais barato que float e não depende de repr
+    pp = round(price * 1000)
+    fp = round(fair_prob * 100000)
+    return f"{ev_id}|{book}|{pick_name}|{pp}|{fp}|{basis}"
 
 
 def now_utc():
     return datetime.now(timezone.utc)
 
 
+def next_poll_delay(start_times: List[datetime], now: datetime) -> float:
+    # 10% do tempo até o próximo jogo, com jitter de ±20% para não bater na
+    # API sempre no mesmo ritmo, limitado a [POLL_MIN, POLL_MAX]
+    upcoming = [(t - now).total_seconds() for t in start_times if t > now]
+    delay = min(upcoming) * 0.1 if upcoming else POLL_MAX_SECONDS
+    delay *= random.uniform(0.8, 1.2)
+    return min(max(POLL_MIN_SECONDS, delay), POLL_MAX_SECONDS)
+
+
 # -------------------- API CLIENTS --------------------
 class OddsAPI:
-    def __init__(self, api_key: str, base_url: str = ODDS_API_BASE):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = ODDS_API_BASE,
+        cache_dir: str = ODDS_CACHE_DIR,
+        cache_ttl: float = ODDS_CACHE_TTL_SECONDS,
+    ):
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        # Se o cache em disco falhar (read-only, disco cheio), as respostas
+        # ficam em memória até serem lidas por odds()
+        self.use_disk = True
+        self._in_memory: Dict[str, bytes] = {}
+
+    def _cache_path(self, sport_key: str, regions: List[str], markets: List[str]) -> str:
+        name = f"{sport_key}_{'-'.join(regions)}_{'-'.join(markets)}.json"
+        return os.path.join(self.cache_dir, name)
+
+    def _cache_fresh(self, path: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(path) < self.cache_ttl
+        except OSError:
+            return False
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=8))
-    def odds(
-        self, sport_key: str, regions: List[str], markets: List[str]
-    ) -> List[Dict[str, Any]]:
+    async def odds_async(
+        self,
+        session: aiohttp.ClientSession,
+        sport_key: str,
+        regions: List[str],
+        markets: List[str],
+    ) -> None:
+        # Baixa (em streaming) a resposta para o cache em disco; os eventos
+        # são lidos depois, um a um, por odds()
+        cache_path = self._cache_path(sport_key, regions, markets)
+        if self.use_disk and self._cache_fresh(cache_path):
+            return
+
         url = f"{self.base_url}/sports/{sport_key}/odds"
         params = {
             "apiKey": self.api_key,
@@ -131,12 +197,66 @@ class OddsAPI:
             "markets": ",".join(markets),
             "oddsFormat": "decimal",
         }
-        resp = requests.get(url, params=params, timeout=25)
-        resp.raise_for_status()
-        return resp.json()
-
+        tmp_path = f"{cache_path}.tmp"
+        async with session.get(url, params=params) as resp:
+            resp.raise_for_status()
+            if self.use_disk:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    f = open(tmp_path, "wb")
+                except OSError as e:
+                    print(f"[WARN] Cache de odds indisponível, usando memória: {e}")
+                    self.use_disk = False
+            if not self.use_disk:
+                self._in_memory[cache_path] = await resp.read()
+                return
+            try:
+                with f:
+                    async for chunk in resp.content.iter_chunked(64 * 1024):
+                        f.write(chunk)
+                os.replace(tmp_path, cache_path)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self._discard(tmp_path)
+                raise
+            except OSError as e:
+                # Falha de escrita no meio do stream: o retry baixa em memória
+                print(f"[WARN] Falha ao gravar cache de odds {cache_path}: {e}")
+                self._discard(tmp_path)
+                self.use_disk = False
+                raise
 
-def send_telegram(token: str, chat_id: str, text: str) -> None:
+    def odds(
+        self, sport_key: str, regions: List[str], markets: List[str]
+    ) -> Iterator[Dict[str, Any]]:
+        # Parse incremental: só um evento por vez em memória
+        cache_path = self._cache_path(sport_key, regions, markets)
+        body = self._in_memory.pop(cache_path, None)
+        try:
+            with io.BytesIO(body) if body is not None else open(cache_path, "rb") as f:
+                yield from ijson.items(f, "item", use_float=True)
+        except (OSError, ijson.JSONError) as e:
+            print(f"[WARN] Falha ao ler odds de {sport_key}: {e}")
+
+
+def group_alerts(texts: List[str], limit: int = TELEGRAM_MAX_CHARS) -> List[List[int]]:
+    # Agrupa (índices de) alertas em lotes que, unidos por ALERT_SEPARATOR,
+    # cabem em uma mensagem. Um alerta maior que o limite vai sozinho.
+    groups: List[List[int]] = []
+    size = 0
+    for i, text in enumerate(texts):
+        extra = len(ALERT_SEPARATOR) + len(text)
+        if groups and size + extra <= limit:
+            groups[-1].append(i)
+            size += extra
+        else:
+            groups.append([i])
+            size = len(text)
+    return groups
+
+
+async def send_telegram_async(
+    session: aiohttp.ClientSession, token: str, chat_id: str, text: str
+) -> None:
     url = f"https://api.telegram.org/bot{token}/sendMessage"
     payload = {
         "chat_id": chat_id,
@@ -144,139 +264,283 @@ def send_telegram(token: str, chat_id: str, text: str) -> None:
         "parse_mode": "MarkdownV2",
         "disable_web_page_preview": True,
     }
-    r = requests.post(url, json=payload, timeout=15)
-    r.raise_for_status()
+    async with session.post(
+        url,
+        data=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+        timeout=aiohttp.ClientTimeout(total=15),
+    ) as r:
+        r.raise_for_status()
 
 
-# -------------------- CORE --------------------
-def pick_fair_prob(book_lines: Dict[str, float]) -> Tuple[str, float]:
-    # 1) Tenta sharp; 2) média das implied
-    for sb in SHARP_BOOKS:
-        if sb in book_lines and book_lines[sb] and book_lines[sb] > 1.0:
-            return sb, 1.0 / book_lines[sb]
-    imps = [1.0 / x for x in book_lines.values() if x and x > 1.0]
-    if not imps:
-        return "", 0.0
-    return "consensus", sum(imps) / len(imps)
+# -------------------- CACHE DE ENVIOS --------------------
+def open_sent_cache(path: str, max_age_seconds: float) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS sent(k TEXT PRIMARY KEY, ts REAL)")
+    # Entradas mais velhas que o cooldown nunca mais bloqueiam nada
+    conn.execute("DELETE FROM sent WHERE ts < ?", (time.time() - max_age_seconds,))
+    conn.commit()
+    return conn
 
 
-def run_scan():
-    api = OddsAPI(ODDS_API_KEY)
-    cache_file = "sent_cache.json"
-    try:
-        with open(cache_file, "r") as f:
-            sent = json.load(f)
-    except Exception:
-        sent = {}
+def last_sent(conn: sqlite3.Connection, k: str) -> float:
+    row = conn.execute("SELECT ts FROM sent WHERE k = ?", (k,)).fetchone()
+    return row[0] if row else 0.0
 
-    now = now_utc()
-    sent_any = False
 
-    for sport_key in SPORT_KEYS:
-        try:
-            events = api.odds(sport_key, REGIONS, MARKETS)
-        except Exception as e:
-            print(f"[WARN] Falha ao puxar {sport_key}: {e}")
-            continue
+def recent_prefixes(conn: sqlite3.Connection) -> Set[str]:
+    # "ev_id|book|pick_name" de cada chave ainda no cache (vide event_key)
+    return {k.rsplit("|", 3)[0] for (k,) in conn.execute("SELECT k FROM sent")}
 
-        for ev in events:
-            try:
-                commence = datetime.fromisoformat(
-                    ev["commence_time"].replace("Z", "+00:00")
-                )
-            except Exception:
-                continue
-            if commence - now > timedelta(hours=MAX_START_TIME_HOURS):
-                continue
 
-            # Monta {book -> {jogador: preço}}
-            lines: Dict[str, Dict[str, float]] = {}
-            for b in ev.get("bookmakers", []):
-                bk = b.get("key", "")
-                for m in b.get("markets", []):
-                    if m.get("key") != "h2h":
-                        continue
-                    out = m.get("outcomes", [])
-                    if len(out) < 2:
-                        continue
-                    prices = {o["name"]: o.get("price") for o in out if "name" in o}
-                    if prices:
-                        lines[bk] = prices
+def mark_sent(conn: sqlite3.Connection, k: str, ts: float) -> None:
+    conn.execute("INSERT OR REPLACE INTO sent(k, ts) VALUES (?, ?)", (k, ts))
+    conn.commit()
 
-            if not lines:
-                continue
 
-            # Descobre os dois participantes
-            participants = set()
-            for d in lines.values():
-                participants.update(d.keys())
-            if len(participants) != 2:
+# -------------------- CORE --------------------
+def pick_fair_prob(book_lines: Dict[str, float]) -> Tuple[str, float]:
+    # 1) Tenta sharp; 2) média das implied. Espera só preços > 1.0 (h2h_prices).
+    for sb in SHARP_BOOKS:
+        x = book_lines.get(sb)
+        if x:
+            return sb, 1.0 / x
+    if not book_lines:
+        return "", 0.0
+    total = 0.0
+    for x in book_lines.values():
+        total += 1.0 / x
+    return "consensus", total / len(book_lines)
+
+
+def h2h_prices(
+    ev: Dict[str, Any]
+) -> Optional[Tuple[str, str, Dict[str, float], Dict[str, float]]]:
+    # Uma só passada pelos bookmakers: descobre os dois participantes e já
+    # separa {book -> preço} de cada um (só preços > 1.0). None se não houver
+    # exatamente dois.
+    p1 = p2 = None
+    p1_prices: Dict[str, float] = {}
+    p2_prices: Dict[str, float] = {}
+    for b in ev.get("bookmakers", []):
+        bk = b.get("key", "")
+        for m in b.get("markets", []):
+            if m.get("key") != "h2h":
+                continue
+            out = m.get("outcomes", [])
+            if len(out) < 2:
                 continue
-            p1, p2 = list(participants)
+            for o in out:
+                name = o.get("name")
+                if name is None:
+                    continue
+                if name == p1:
+                    prices = p1_prices
+                elif name == p2:
+                    prices = p2_prices
+                elif p1 is None:
+                    p1, prices = name, p1_prices
+                elif p2 is None:
+                    p2, prices = name, p2_prices
+                else:
+                    return None
+                price = o.get("price")
+                if price and price > 1.0:
+                    prices[bk] = price
+    if p2 is None:
+        return None
+    return p1, p2, p1_prices, p2_prices
+
+
+def find_alerts(
+    events: Iterable[Dict[str, Any]],
+    now: datetime,
+    cutoff_iso: str,
+    sent: sqlite3.Connection,
+    recent: Set[str],
+) -> Tuple[List[Tuple[str, str, str]], List[datetime]]:
+    # Alertas de valor de uma sport key, como (mensagem, chave, descrição p/
+    # log), e o início de cada evento dentro da janela.
+    now_ts = now.timestamp()
+    start_times: List[datetime] = []
+    alerts: List[Tuple[str, str, str]] = []
+    for ev in events:
+        # Mesmo formato fixo dos dois lados: comparar strings basta, e
+        # eventos fora da janela nem chegam a ser parseados
+        commence_iso = ev.get("commence_time") or ""
+        if commence_iso > cutoff_iso:
+            continue
+        try:
+            commence = datetime.strptime(commence_iso, ISO_UTC_FORMAT).replace(
+                tzinfo=timezone.utc
+            )
+        except ValueError:
+            continue
+        start_times.append(commence)
 
-            # Preços por participante
-            p1_prices = {bk: d.get(p1) for bk, d in lines.items() if d.get(p1)}
-            p2_prices = {bk: d.get(p2) for bk, d in lines.items() if d.get(p2)}
+        parsed = h2h_prices(ev)
+        if parsed is None:
+            continue
+        p1, p2, p1_prices, p2_prices = parsed
 
-            basis1, fair1 = pick_fair_prob(p1_prices)
-            basis2, fair2 = pick_fair_prob(p2_prices)
-            if fair1 <= 0 or fair2 <= 0:
+        # Só as casas-alvo com odd mínima; sem nenhuma, nada a alertar
+        p1_target = {
+            bk: px
+            for bk, px in p1_prices.items()
+            if bk in TARGET_BOOKS and px >= MIN_DECIMAL_ODDS
+        }
+        p2_target = {
+            bk: px
+            for bk, px in p2_prices.items()
+            if bk in TARGET_BOOKS and px >= MIN_DECIMAL_ODDS
+        }
+        if not (p1_target or p2_target):
+            continue
+
+        basis1, fair1 = pick_fair_prob(p1_prices)
+        basis2, fair2 = pick_fair_prob(p2_prices)
+        if fair1 <= 0 or fair2 <= 0:
+            continue
+        s = fair1 + fair2
+        if s > 0:
+            fair1, fair2 = fair1 / s, fair2 / s
+
+        # Checa valor nas casas‑alvo
+        for pick_name, fair_prob, book_prices, basis in [
+            (p1, fair1, p1_target, basis1),
+            (p2, fair2, p2_target, basis2),
+        ]:
+            if fair_prob <= 0:
                 continue
-            s = fair1 + fair2
-            if s > 0:
-                fair1, fair2 = fair1 / s, fair2 / s
-
-            # Checa valor nas casas‑alvo
-            for pick_name, fair_prob, book_prices, basis in [
-                (p1, fair1, p1_prices, basis1),
-                (p2, fair2, p2_prices, basis2),
-            ]:
-                if fair_prob <= 0:
+            # edge >= MIN_EDGE  <=>  price >= (1 + MIN_EDGE) / fair_prob:
+            # um limiar por jogador, e a edge só é calculada p/ quem passa
+            min_price = (1.0 + MIN_EDGE) / fair_prob
+            for book, price in book_prices.items():
+                if price < min_price:
                     continue
-                for book, price in book_prices.items():
-                    if book not in TARGET_BOOKS:
-                        continue
-                    if not price or price < MIN_DECIMAL_ODDS:
-                        continue
-                    edge = price * fair_prob - 1.0
-                    if edge < (MIN_EDGE_PCT / 100.0):
-                        continue
+                edge = price * fair_prob - 1.0
 
+                # Sem envio recente para (evento, casa, jogador): nem monta
+                # a chave completa nem consulta o banco
+                pre = f"{ev['id']}|{book}|{pick_name}"
+                k = None
+                if pre in recent:
                     k = event_key(
                         ev["id"], book, pick_name, float(price), float(fair_prob), basis
                     )
-                    last = sent.get(k, 0)
-                    if (now.timestamp() - last) < (COOLDOWN_MINUTES * 60):
+                    last = last_sent(sent, k)
+                    if (now_ts - last) < (COOLDOWN_MINUTES * 60):
                         continue
 
-                    payload = {
-                        "away": ev.get("away_team", "Jogador A"),
-                        "home": ev.get("home_team", "Jogador B"),
-                        "start_time_local": commence.astimezone().strftime("%d/%m %H:%M"),
-                        "pick_name": pick_name,
-                        "book": book,
-                        "price": float(price),
-                        "edge_pct": 100.0 * edge,
-                        "fair_prob": float(fair_prob),
-                        "kelly": kelly_fraction(float(price), float(fair_prob)),
-                        "basis": basis or "consensus",
-                    }
-                    try:
-                        send_telegram(TG_TOKEN, TG_CHAT_ID, format_alert(payload))
-                        sent[k] = now.timestamp()
-                        sent_any = True
-                        print(
-                            f"[OK] Alerta enviado: {book} {pick_name} @ {price:.2f} (edge {100*edge:.1f}%)"
-                        )
-                    except Exception as e:
-                        print(f"[WARN] Falha ao enviar Telegram: {e}")
-
-    with open(cache_file, "w") as f:
-        json.dump(sent, f)
+                payload = {
+                    "away": ev.get("away_team", "Jogador A"),
+                    "home": ev.get("home_team", "Jogador B"),
+                    "start_time_local": commence.astimezone().strftime("%d/%m %H:%M"),
+                    "pick_name": pick_name,
+                    "book": book,
+                    "price": float(price),
+                    "edge_pct": 100.0 * edge,
+                    "fair_prob": float(fair_prob),
+                    "kelly": kelly_fraction(float(price), float(fair_prob)),
+                    "basis": basis or "consensus",
+                }
+                if k is None:
+                    k = event_key(
+                        ev["id"], book, pick_name, float(price), float(fair_prob), basis
+                    )
+                alerts.append(
+                    (
+                        format_alert(payload),
+                        k,
+                        f"{book} {pick_name} @ {price:.2f} (edge {100*edge:.1f}%)",
+                    )
+                )
+    return alerts, start_times
+
+
+async def run_scan() -> float:
+    api = OddsAPI(ODDS_API_KEY)
+    sent = open_sent_cache(SENT_CACHE_DB, 2 * COOLDOWN_MINUTES * 60)
+    try:
+        return await scan_all(api, sent)
+    finally:
+        sent.close()
+
+
+async def scan_all(api: OddsAPI, sent: sqlite3.Connection) -> float:
+    recent = recent_prefixes(sent)
+
+    now = now_utc()
+    now_ts = now.timestamp()
+    cutoff_iso = (now + timedelta(hours=MAX_START_TIME_HOURS)).strftime(ISO_UTC_FORMAT)
+    sent_any = False
+    start_times: List[datetime] = []
+    # Envios em andamento: (task, [(chave, descrição p/ log)] dos alertas do lote)
+    pending_sends: List[Tuple[asyncio.Task, List[Tuple[str, str]]]] = []
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    # JSON comprime muito bem; aiohttp descomprime sozinho (auto_decompress)
+    async with aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=25),
+        headers={"Accept-Encoding": "gzip"},
+    ) as session:
+
+        async def scan_sport(sport_key: str) -> None:
+            try:
+                async with sem:
+                    await api.odds_async(session, sport_key, REGIONS, MARKETS)
+            except Exception as e:
+                print(f"[WARN] Falha ao puxar {sport_key}: {e}")
+                return
+            # Erro em uma sport key não derruba as outras nem os envios já feitos
+            try:
+                alerts, starts = find_alerts(
+                    api.odds(sport_key, REGIONS, MARKETS), now, cutoff_iso, sent, recent
+                )
+            except Exception as e:
+                print(f"[WARN] Falha ao processar {sport_key}: {e}")
+                return
+            start_times.extend(starts)
+            # Alertas agrupados (uma mensagem por lote), enviados em background
+            # enquanto as outras sport keys ainda baixam
+            for group in group_alerts([text for text, _, _ in alerts]):
+                text = ALERT_SEPARATOR.join(alerts[i][0] for i in group)
+                task = asyncio.create_task(
+                    send_telegram_async(session, TG_TOKEN, TG_CHAT_ID, text)
+                )
+                pending_sends.append((task, [alerts[i][1:] for i in group]))
+
+        # Sport keys em paralelo (até MAX_CONCURRENT_REQUESTS downloads por vez)
+        await asyncio.gather(*(scan_sport(sk) for sk in SPORT_KEYS))
+        results = await asyncio.gather(
+            *(task for task, _ in pending_sends), return_exceptions=True
+        )
+
+    # Só marca como enviado o que o Telegram aceitou; o resto tenta de novo
+    for (_, batch), result in zip(pending_sends, results):
+        if isinstance(result, BaseException):
+            print(f"[WARN] Falha ao enviar Telegram: {result}")
+            continue
+        for k, desc in batch:
+            mark_sent(sent, k, now_ts)
+            print(f"[OK] Alerta enviado: {desc}")
+        sent_any = True
+
     print(
         "Scan finished" + (" (com alertas)" if sent_any else " (sem alertas)")
     )
+    return next_poll_delay(start_times, now)
 
 
 if __name__ == "__main__":
-    run_scan()
+    while True:
+        try:
+            delay = asyncio.run(run_scan())
+        except Exception as e:
+            # Um scan com erro não pode derrubar o scanner; tenta de novo depois
+            print(f"[WARN] Scan falhou: {e}")
+            delay = POLL_MAX_SECONDS
+        print(f"Próximo scan em {delay:.0f}s")
+        time.sleep(delay)
@@ -24,15 +24,30 @@ Please respect the API's rate limits.
 """
 
 import os
-import json
 import time
+import asyncio
+import sqlite3
 from datetime import datetime, timezone
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 
-import requests
+import aiohttp
+import orjson
 
 BALLDONTLIE_API_BASE = "https://api.balldontlie.io/v1"
 
+# Upper bound on in-flight BallDontLie requests, to respect rate limits.
+MAX_CONCURRENT_REQUESTS = 8
+
+# Player IDs practically never change, so they are cached on disk for a month.
+PLAYER_ID_CACHE_FILE = "player_id_cache.json"
+PLAYER_ID_CACHE_TTL_SECONDS = 30 * 86400
+# Names the API could not resolve are cached as ID 0 for a day, so a typo in
+# NBA_PLAYERS does not cost extra lookups on every run.
+PLAYER_ID_MISS_TTL_SECONDS = 86400
+
+# Alerts already sent (state key -> timestamp), used for the cooldown.
+SENT_CACHE_DB = "nba_alerts_cache.db"
+
 # Environment variables
 BALLDONTLIE_API_KEY = os.getenv("BALLDONTLIE_API_KEY", "").strip()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "").strip()
@@ -50,7 +65,7 @@ DEFAULT_PLAYERS = [
 ]
 
 
-def send_telegram(text: str) -> None:
+async def send_telegram(session: aiohttp.ClientSession, text: str) -> None:
     """Send a message to the configured Telegram chat."""
     if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID):
         print("[WARN] Telegram not configured.")
@@ -63,36 +78,92 @@ def send_telegram(text: str) -> None:
         "disable_web_page_preview": True,
     }
     try:
-        r = requests.post(url, json=payload, timeout=15)
-        r.raise_for_status()
+        async with session.post(
+            url,
+            data=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=aiohttp.ClientTimeout(total=15),
+        ) as r:
+            r.raise_for_status()
     except Exception as exc:
         print(f"[WARN] Failed to send Telegram message: {exc}")
 
 
-def get_player_id(name: str) -> int:
-    """Look up a player's ID using their full name. Returns 0 if not found."""
+async def send_alerts(messages: List[str]) -> None:
+    """Send all alert messages concurrently over one Telegram session."""
+    async with aiohttp.ClientSession(headers={"Accept-Encoding": "gzip"}) as session:
+        await asyncio.gather(*(send_telegram(session, msg) for msg in messages))
+
+
+def api_headers() -> Dict[str, str]:
+    """Headers for BallDontLie requests (gzip, plus the API key if configured)."""
+    headers = {"Accept-Encoding": "gzip"}
+    if BALLDONTLIE_API_KEY:
+        headers["Authorization"] = BALLDONTLIE_API_KEY
+    return headers
+
+
+async def get_player_id(session: aiohttp.ClientSession, name: str) -> Optional[int]:
+    """Look up a player's ID using their full name.
+
+    Returns 0 if the search found no such player, or None if the request
+    itself failed.
+    """
     # The players endpoint supports searching by name via the "search" query.
     params = {"search": name, "per_page": 1}
     try:
-        headers = {}
-        if BALLDONTLIE_API_KEY:
-            headers["Authorization"] = BALLDONTLIE_API_KEY
-        r = requests.get(
+        async with session.get(
             f"{BALLDONTLIE_API_BASE}/players",
             params=params,
-            headers=headers,
-            timeout=20,
-        )
-        r.raise_for_status()
-        data = r.json().get("data", [])
-        if data:
-            return int(data[0]["id"])
+            timeout=aiohttp.ClientTimeout(total=20),
+        ) as r:
+            r.raise_for_status()
+            data = orjson.loads(await r.read()).get("data", [])
+        return int(data[0]["id"]) if data else 0
     except Exception as exc:
         print(f"[WARN] Failed to fetch player ID for {name}: {exc}")
-    return 0
+    return None
 
 
-def get_last_five_games_points(player_id: int) -> List[int]:
+async def get_player_ids_bulk(
+    session: aiohttp.ClientSession, names: List[str]
+) -> Dict[str, int]:
+    """Resolve many player names at once from the active players listing.
+
+    Pages through ``/players/active`` (100 players per request) and stops
+    as soon as every requested name has been found. Returns a mapping of
+    lowercased full name to player ID; names not found are omitted.
+    """
+    wanted = {name.lower() for name in names}
+    ids: Dict[str, int] = {}
+    params = {"per_page": 100}
+    try:
+        while wanted - ids.keys():
+            async with session.get(
+                f"{BALLDONTLIE_API_BASE}/players/active",
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=20),
+            ) as r:
+                r.raise_for_status()
+                body = orjson.loads(await r.read())
+            for player in body.get("data", []):
+                full_name = (
+                    f"{player.get('first_name', '')} {player.get('last_name', '')}"
+                ).lower()
+                if full_name in wanted:
+                    ids[full_name] = int(player["id"])
+            cursor = body.get("meta", {}).get("next_cursor")
+            if not cursor:
+                break
+            params["cursor"] = cursor
+    except Exception as exc:
+        print(f"[WARN] Failed to fetch active players list: {exc}")
+    return ids
+
+
+async def get_last_five_games_points(
+    session: aiohttp.ClientSession, player_id: int
+) -> List[int]:
     """Fetch the point totals from the player's last five games.
 
     Returns a list of integers (points) ordered from oldest to most
@@ -107,17 +178,13 @@ def get_last_five_games_points(player_id: int) -> List[int]:
         "per_page": 25,
     }
     try:
-        headers = {}
-        if BALLDONTLIE_API_KEY:
-            headers["Authorization"] = BALLDONTLIE_API_KEY
-        r = requests.get(
+        async with session.get(
             f"{BALLDONTLIE_API_BASE}/stats",
             params=params,
-            headers=headers,
-            timeout=30,
-        )
-        r.raise_for_status()
-        data = r.json().get("data", [])
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as r:
+            r.raise_for_status()
+            data = orjson.loads(await r.read()).get("data", [])
         # Sort by game date in descending order (most recent first)
         stats_sorted = sorted(
             data, key=lambda s: s.get("game", {}).get("date", ""), reverse=True
@@ -133,6 +200,115 @@ def get_last_five_games_points(player_id: int) -> List[int]:
     return []
 
 
+async def resolve_player_ids(
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    names: List[str],
+    skip_bulk: Set[str],
+) -> Dict[str, int]:
+    """Map lowercased player names to IDs.
+
+    Uses a single bulk listing first and falls back to a per-name search
+    only for players the listing did not cover. Names in ``skip_bulk``
+    (lowercased; earlier misses) go straight to the per-name search, so
+    they never force a full walk of the listing again. Names the search
+    confirms as unknown map to 0; names whose lookup failed are left out.
+    """
+    bulk_names = [name for name in names if name.lower() not in skip_bulk]
+    ids = await get_player_ids_bulk(session, bulk_names) if bulk_names else {}
+    missing = [name for name in names if name.lower() not in ids]
+
+    async def lookup(name: str) -> Optional[int]:
+        async with sem:
+            return await get_player_id(session, name)
+
+    for name, player_id in zip(
+        missing, await asyncio.gather(*(lookup(name) for name in missing))
+    ):
+        if player_id is not None:
+            ids[name.lower()] = player_id
+    return ids
+
+
+async def fetch_player(
+    session: aiohttp.ClientSession, sem: asyncio.Semaphore, name: str, player_id: int
+) -> Tuple[str, int, List[int]]:
+    """Fetch a resolved player's last five games' points."""
+    if not player_id:
+        return name, 0, []
+    async with sem:
+        return name, player_id, await get_last_five_games_points(session, player_id)
+
+
+async def fetch_players(
+    player_names: List[str], known_ids: Dict[str, int], skip_bulk: Set[str]
+) -> Tuple[List[Tuple[str, int, List[int]]], Dict[str, int]]:
+    """Fetch all players concurrently, at most MAX_CONCURRENT_REQUESTS at a time.
+
+    ``known_ids`` maps lowercased names to already known player IDs (0 for
+    known misses); only the remaining names are looked up, skipping the
+    bulk listing for names in ``skip_bulk``. Returns the per-player results
+    and the newly resolved ``{name_lower: id}`` entries.
+    """
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with aiohttp.ClientSession(headers=api_headers()) as session:
+        unknown = [name for name in player_names if name.lower() not in known_ids]
+        resolved = (
+            await resolve_player_ids(session, sem, unknown, skip_bulk) if unknown else {}
+        )
+        ids = {**known_ids, **resolved}
+        results = await asyncio.gather(
+            *(
+                fetch_player(session, sem, name, ids.get(name.lower(), 0))
+                for name in player_names
+            )
+        )
+    return results, resolved
+
+
+def load_player_id_cache(path: str) -> Dict[str, List[float]]:
+    """Load the ``{name_lower: [id, fetched_ts]}`` cache (id 0 = not found), or {}."""
+    try:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except Exception:
+        return {}
+
+
+def save_player_id_cache(path: str, cache: Dict[str, List[float]]) -> None:
+    """Atomically write the player ID cache (temp file + rename)."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(cache))
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        print(f"[WARN] Failed to save player ID cache: {exc}")
+
+
+def open_sent_cache(path: str, max_age_seconds: float) -> sqlite3.Connection:
+    """Open the sent-alerts database, dropping entries older than ``max_age_seconds``."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS sent(k TEXT PRIMARY KEY, ts REAL)")
+    conn.execute("DELETE FROM sent WHERE ts < ?", (time.time() - max_age_seconds,))
+    conn.commit()
+    return conn
+
+
+def last_sent(conn: sqlite3.Connection, key: str) -> float:
+    """Return when the alert for ``key`` was last sent (0 if never)."""
+    row = conn.execute("SELECT ts FROM sent WHERE k = ?", (key,)).fetchone()
+    return row[0] if row else 0.0
+
+
+def mark_sent(conn: sqlite3.Connection, key: str, ts: float) -> None:
+    """Record that the alert for ``key`` was sent at ``ts``."""
+    conn.execute("INSERT OR REPLACE INTO sent(k, ts) VALUES (?, ?)", (key, ts))
+    conn.commit()
+
+
 def qualifies_pattern_a(points: List[int]) -> bool:
     """Return True if points match the pattern [>=20, >=20, >=20, >=20, <20]."""
     return (
@@ -147,12 +323,12 @@ def qualifies_pattern_b(points: List[int]) -> bool:
     return len(points) == 5 and all(p >= 20 for p in points)
 
 
+_MD_ESCAPE = str.maketrans({ch: "\\" + ch for ch in "_[]()~`>#+-=|{}.!"})
+
+
 def sanitize_md(text: str) -> str:
     """Escape characters that have special meaning in Telegram MarkdownV2."""
-    specials = "_[]()~`>#+-=|{}.!"
-    for ch in specials:
-        text = text.replace(ch, f"\{ch}")
-    return text
+    return text.translate(_MD_ESCAPE)
 
 
 def format_alert(player_name: str, points: List[int], pattern: str) -> str:
@@ -163,7 +339,7 @@ def format_alert(player_name: str, points: List[int], pattern: str) -> str:
         f"Últimas 5 partidas: {', '.join(str(p) for p in points)} pontos",
         f"Padrão: {pattern}",
     ]
-    return "\n".join(sanitize_md(p) for p in parts)
+    return sanitize_md("\n".join(parts))
 
 
 def main() -> None:
@@ -174,28 +350,33 @@ def main() -> None:
     else:
         player_names = DEFAULT_PLAYERS
 
-    # Cache to avoid duplicate alerts within a day (timestamp in seconds)
-    cache_file = "nba_alerts_cache.json"
-    try:
-        with open(cache_file, "r") as f:
-            sent_cache: Dict[str, float] = json.load(f)
-    except Exception:
-        sent_cache = {}
-
     now_ts = time.time()
     # We'll avoid sending duplicate alerts for the same player within 12 hours
     cooldown_seconds = 12 * 3600
+    sent_cache = open_sent_cache(SENT_CACHE_DB, 2 * cooldown_seconds)
+
+    id_cache = load_player_id_cache(PLAYER_ID_CACHE_FILE)
+    known_ids = {
+        name: int(entry[0])
+        for name, entry in id_cache.items()
+        if now_ts - entry[1]
+        < (PLAYER_ID_CACHE_TTL_SECONDS if entry[0] else PLAYER_ID_MISS_TTL_SECONDS)
+    }
+    # Past misses whose negative TTL expired: the bulk listing already failed
+    # to find them, so only the per-name search is retried.
+    previous_misses = {name for name, entry in id_cache.items() if not entry[0]}
+    results, resolved = asyncio.run(
+        fetch_players(player_names, known_ids, previous_misses)
+    )
+    for name, player_id in resolved.items():
+        id_cache[name] = [player_id, now_ts]
 
-    for name in player_names:
-        player_id = get_player_id(name)
-        if not player_id:
-            continue
-        points = get_last_five_games_points(player_id)
-        if not points:
+    alerts: List[Tuple[str, str]] = []  # (cache key, message)
+    for name, player_id, points in results:
+        if not player_id or not points:
             continue
         key = f"{player_id}|{points}"  # Unique key for this state
-        last_sent = sent_cache.get(key, 0)
-        if now_ts - last_sent < cooldown_seconds:
+        if now_ts - last_sent(sent_cache, key) < cooldown_seconds:
             continue
         pattern = None
         if qualifies_pattern_b(points):
@@ -203,16 +384,16 @@ def main() -> None:
         elif qualifies_pattern_a(points):
             pattern = "4 jogos com 20+ seguidos de um <20"
         if pattern:
-            msg = format_alert(name, points, pattern)
-            send_telegram(msg)
-            sent_cache[key] = now_ts
+            alerts.append((key, format_alert(name, points, pattern)))
 
-    # Save cache
-    try:
-        with open(cache_file, "w") as f:
-            json.dump(sent_cache, f)
-    except Exception:
-        pass
+    if alerts:
+        asyncio.run(send_alerts([msg for _, msg in alerts]))
+    for key, _ in alerts:
+        mark_sent(sent_cache, key, now_ts)
+
+    save_player_id_cache(PLAYER_ID_CACHE_FILE, id_cache)
+
+    sent_cache.close()
 
     print("NBA scan finished")
 